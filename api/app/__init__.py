@@ -1,3 +1,14 @@
-"""
-OSINT AI Agent package.
-"""
+"""
+OSINT AI Agent package.
+"""
+
+import logging
+import os
+
+# Configured once for the whole package. Tool-call logging is DEBUG-level so
+# the hot loop stays quiet (and skips stdout flushes) unless LOG_LEVEL asks
+# for it.
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(levelname)s:%(name)s: %(message)s",
+)
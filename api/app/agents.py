@@ -1,35 +1,53 @@
 # In api/app/agents.py
 
+import asyncio
 import os
-import json
-from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
+import re
+from typing import Any, Dict, List
+
+import orjson
+import tiktoken
+import xxhash
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
 from langchain_openai import ChatOpenAI
 from langchain_anthropic import ChatAnthropic
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.schema import Document
+from langgraph.config import get_stream_writer
 
-from .tools import web_search, AVAILABLE_TOOLS
+from .tools import web_search, tool_cache_stats, AVAILABLE_TOOLS
 from .prompts import (
-    ORCHESTRATOR_PROMPT,
-    RESEARCHER_PROMPT,
-    ANALYST_PROMPT,
+    COMMON_SYSTEM_PREAMBLE,
+    ORCHESTRATOR_PROMPT_STATIC,
+    RESEARCHER_PROMPT_STATIC,
+    ANALYST_PROMPT_STATIC,
     CLEANER_PROMPT,
+    COMPACTION_PROMPT,
     FINAL_REPORT_PROMPT,
-    JUDGE_PROMPT  # Import the new Judge prompt
+    JUDGE_PROMPT_STATIC,
+    render_researcher_dynamic,
+    render_orchestrator_dynamic,
+    render_analyst_dynamic,
+    render_judge_cleaned_data,
+    render_judge_report,
 )
-from .types import InvestigationState
+from .types import InvestigationState, OrchestratorPlan, JudgeVerdict
 
 # ==============================================================================
 # === 1. CENTRALIZED LLM INITIALIZATION ========================================
 # ==============================================================================
 # All models are defined here, with temperature=0 for factuality.
 
-# Claude Sonnet for fast orchestration
-claude_sonnet = ChatAnthropic(model="claude-sonnet-4-20250514", temperature=0, max_tokens=2048)
+# Claude Sonnet for fast orchestration. Its outputs (entity lists, tool-call
+# plans) are small JSON objects, so a tight max_tokens keeps decode latency low.
+claude_sonnet = ChatAnthropic(model="claude-sonnet-4-20250514", temperature=0, max_tokens=512)
 
-# GPT-4o for nuanced analysis
-gpt_4o = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=0, max_tokens=2048)
+# GPT-4o for nuanced analysis. The analyst runs on the Responses API so each
+# loop iteration can continue the server-side conversation via
+# previous_response_id instead of resending the whole accumulated context.
+gpt_4o = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=0, max_tokens=2048, use_responses_api=True)
 
 # Gemini 1.5 Pro for large context cleaning and synthesis
 try:
@@ -43,120 +61,392 @@ except Exception as e:
     print(f"WARNING: Failed to initialize Gemini. Falling back to GPT-4o. Error: {e}")
     gemini_1_5 = ChatOpenAI(model="gpt-4o-2024-08-06", temperature=0, max_tokens=4096)
 
-# Claude Opus as the high-accuracy Judge
-claude_opus = ChatAnthropic(model="claude-opus-4-20250514", temperature=0, max_tokens=4096)
+# Claude Opus as the high-accuracy Judge. The verdict is a two-key JSON object,
+# so it gets a small output budget too.
+claude_opus = ChatAnthropic(model="claude-opus-4-20250514", temperature=0, max_tokens=1024)
 
 
-# ==============================================================================
-# === 2. AGENT NODE FUNCTIONS ==================================================
-# ==============================================================================
+# Cap on per-document content when building the cleaner's context. Search
+# snippets beyond this add tokens without adding signal.
+_MAX_DOC_CHARS = 2000
+
+# Upper bound on tool calls the orchestrator may batch into one cycle.
+_MAX_TOOL_CALLS_PER_STEP = 3
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _entity_record(name: str) -> Dict[str, str]:
+    """Builds an entity record with its social-media handle precomputed.
 
-def orchestrator(state: InvestigationState) -> InvestigationState:
+    The handle is derived once here so per-call string scans in the tools are
+    avoided; every later consumer just reads the field.
     """
-    The main orchestrator wrapper. It calls the query analyzer on the first step
-    and then calls the tool selection orchestrator on every step.
+    return {"name": name, "handle": _WHITESPACE.sub('', name)}
+
+
+def _compact_json(data: Any) -> str:
+    """Serializes data for an LLM prompt without indentation.
+
+    Pretty-printing roughly doubles the token count of nested JSON with no
+    quality benefit, so prompt-bound payloads are always minified. orjson is
+    used because cleaned_data can be large and this runs on the hot path.
     """
-    if state.get('retrieval_count', 0) == 0:
-        # On the very first run, analyze the query to find entities.
-        state = query_analysis_node(state)
-    
-    # Now, proceed with the regular orchestration step.
-    state = orchestrator_node(state)
-    return state
+    return orjson.dumps(data).decode()
+
+
+def _compact_content(text: str) -> str:
+    """Collapses whitespace runs and truncates over-long document content."""
+    return _WHITESPACE.sub(' ', text).strip()[:_MAX_DOC_CHARS]
+
+
+# Accumulated retrieved content above this many tokens triggers compaction:
+# the oldest already-analyzed snippets are folded into one summary item.
+_CONTEXT_TOKEN_BUDGET = 6000
+
+# tiktoken fetches its BPE table on first use, so the encoder is initialized
+# lazily and a chars/4 estimate stands in when the fetch is unavailable
+# (offline environments). The budget check only needs to be roughly right.
+_token_encoder = None
+_token_encoder_failed = False
+
+
+def _estimate_tokens(text: str) -> int:
+    """Counts tokens with tiktoken when available, else estimates chars/4."""
+    global _token_encoder, _token_encoder_failed
+    if _token_encoder is None and not _token_encoder_failed:
+        try:
+            _token_encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:
+            _token_encoder_failed = True
+    if _token_encoder is not None:
+        return len(_token_encoder.encode(text))
+    return max(1, len(text) // 4)
+
+
+# Two snippets whose token sets overlap at least this much are treated as the
+# same document for cleaning purposes.
+_NEAR_DUPLICATE_JACCARD = 0.8
+
+
+def _collapse_near_duplicates(contents: List[str]) -> List[str]:
+    """Drops snippets that are near-duplicates of an earlier one.
+
+    Search tools frequently return the same passage with minor wording or
+    truncation differences, which the exact-hash dedup at append time cannot
+    catch. This single batched pass compares token sets (Jaccard similarity)
+    and keeps only the first representative of each group, so the cleaner's
+    Gemini call is not billed repeatedly for the same text. Done locally in
+    one pass rather than per-item LLM calls; n is at most a few dozen
+    snippets, so the quadratic comparison is negligible.
+    """
+    kept: List[str] = []
+    kept_tokens: List[set] = []
+    for content in contents:
+        tokens = set(content.lower().split())
+        if not tokens:
+            continue
+        duplicate = False
+        for seen in kept_tokens:
+            overlap = len(tokens & seen) / len(tokens | seen)
+            if overlap >= _NEAR_DUPLICATE_JACCARD:
+                duplicate = True
+                break
+        if not duplicate:
+            kept.append(content)
+            kept_tokens.append(tokens)
+    return kept
+
+
+def _static_system_message(text: str) -> SystemMessage:
+    """Prepends the shared preamble to an agent's static system prompt.
+
+    These blocks carry no cache_control breakpoint on purpose: Anthropic only
+    caches prefixes of at least 1024 tokens, and preamble plus role prompt is
+    a few hundred at most, so a breakpoint here would be silently ignored.
+    The only explicit breakpoint sits on the judge's cleaned-data block (see
+    _judge_prefix_messages), whose prefix is long enough to qualify.
+    """
+    return SystemMessage(content=COMMON_SYSTEM_PREAMBLE + text)
+
+
+# The static prompt parts never change within (or across) investigations, so
+# they are rendered once here and stay byte-identical across every call.
+RESEARCHER_SYSTEM = _static_system_message(RESEARCHER_PROMPT_STATIC)
+ORCHESTRATOR_SYSTEM = _static_system_message(
+    ORCHESTRATOR_PROMPT_STATIC.format(tool_names=", ".join(AVAILABLE_TOOLS.keys()))
+)
+JUDGE_SYSTEM = _static_system_message(JUDGE_PROMPT_STATIC)
+
+# GPT-4o has no explicit cache markers; OpenAI prefix-caches automatically as
+# long as this system message stays byte-identical across calls.
+ANALYST_SYSTEM = SystemMessage(content=COMMON_SYSTEM_PREAMBLE + ANALYST_PROMPT_STATIC)
+
+
+# ==============================================================================
+# === 2. MODULE-LEVEL CHAINS ===================================================
+# ==============================================================================
+# Chains are assembled once at import time. Rebuilding the prompt template and
+# Runnable pipeline inside every node call re-parsed the template and
+# re-allocated the chain on each of the up-to-15 steps per investigation.
+
+RESEARCHER_CHAIN = claude_sonnet | JsonOutputParser()
+# Orchestrator and judge use provider-enforced structured output (Anthropic
+# tool forcing) instead of prompt-level "JSON only" discipline, so malformed
+# output and parse retries drop out of these call classes entirely.
+ORCHESTRATOR_CHAIN = claude_sonnet.with_structured_output(OrchestratorPlan)
+# The analyst is not a chain: pivot_agent_node invokes gpt_4o directly so it
+# can pass previous_response_id per call and read response.id back off the
+# message metadata, which a model|parser pipeline would discard.
+ANALYST_PARSER = JsonOutputParser()
+CLEANER_CHAIN = (
+    ChatPromptTemplate.from_messages([("system", COMMON_SYSTEM_PREAMBLE), ("human", CLEANER_PROMPT)])
+    | gemini_1_5 | JsonOutputParser()
+)
+REPORT_WRITER_CHAIN = (
+    ChatPromptTemplate.from_messages([("system", COMMON_SYSTEM_PREAMBLE), ("human", FINAL_REPORT_PROMPT)])
+    | gemini_1_5 | StrOutputParser()
+)
+JUDGE_DRAFT_CHAIN = claude_sonnet.with_structured_output(JudgeVerdict)
+JUDGE_ESCALATION_CHAIN = claude_opus.with_structured_output(JudgeVerdict)
+# The cache-warmup model for the judge. Anthropic builds the cache prefix
+# from tools -> system -> messages, and with_structured_output makes the
+# draft judge send tools=[JudgeVerdict] with a forced tool_choice - so the
+# prefill must bind the identical schema the same way, or it writes a cache
+# entry the real call can never hit. max_tokens=1 keeps the warmup's decode
+# cost at a single token.
+JUDGE_PREFILL_MODEL = claude_sonnet.bind_tools(
+    [JudgeVerdict], tool_choice="JudgeVerdict"
+).bind(max_tokens=1)
+
+
+# ==============================================================================
+# === 3. AGENT NODE FUNCTIONS ==================================================
+# ==============================================================================
 
 # --- Investigation Loop Nodes ---
 
-def query_analysis_node(state: InvestigationState) -> InvestigationState:
+def _append_new_items(state: InvestigationState, sources: List[str], contents: List[str]) -> int:
+    """Appends retrieved (source, content) columns, skipping seen content.
+
+    Identical snippets often come back from different tools/queries; deduping
+    here keeps them from being resent to the analyst and cleaner on every
+    later step. Returns the number of items actually appended.
+    """
+    seen = set(state.setdefault('content_hashes', []))
+    appended = 0
+    for source, content in zip(sources, contents):
+        content = (content or '').strip()
+        if not content:
+            continue
+        # xxh64 instead of the builtin hash(): str hashing is salted per
+        # process, so persisted hashes would stop matching after a restart
+        # resumes a checkpointed investigation.
+        h = xxhash.xxh64_intdigest(content.lower())
+        if h in seen:
+            continue
+        seen.add(h)
+        state['content_hashes'].append(h)
+        state['retrieved_sources'].append(source)
+        state['retrieved_contents'].append(content)
+        appended += 1
+    return appended
+
+async def query_analysis_node(state: InvestigationState) -> InvestigationState:
     """Parses the initial query to identify entities."""
     state['log'].append("INFO: Parsing query to identify entities...")
-    prompt = PromptTemplate(template=RESEARCHER_PROMPT, input_variables=["query"])
-    chain = prompt | claude_sonnet | JsonOutputParser()
-    
+
     try:
-        result = chain.invoke({"query": state['query']})
-        state['entities'] = result.get('entities', [state['query']])
-        state['log'].append(f"SUCCESS: Identified entities: {state['entities']}")
+        result = await RESEARCHER_CHAIN.ainvoke([
+            RESEARCHER_SYSTEM,
+            HumanMessage(content=render_researcher_dynamic(state['query']))
+        ])
+        names = result.get('entities', [state['query']])
+        state['entities'] = [_entity_record(name) for name in names]
+        state['entity_extraction_failed'] = False
+        state['log'].append(f"SUCCESS: Identified entities: {names}")
     except Exception as e:
         state['log'].append(f"ERROR: Failed to parse query. Using original query as entity. Error: {e}")
-        state['entities'] = [state['query']]
+        state['entities'] = [_entity_record(state['query'])]
+        # The fallback entity is just the raw query, which looks identical to
+        # a genuinely simple query; flag the failure so the router keeps the
+        # full investigation loop instead of downgrading to one web search.
+        state['entity_extraction_failed'] = True
+    return state
+
+
+async def single_tool_node(state: InvestigationState) -> InvestigationState:
+    """Fast path for trivially simple queries: one web search, no loop.
+
+    When the query is nothing more than a single entity name there is no plan
+    to orchestrate; a direct web search gathers the material and the graph
+    jumps straight to cleaning and reporting.
+    """
+    entity = state['entities'][0]['name']
+    state['log'].append(f"INFO: Simple single-entity query. Running direct web search for '{entity}'...")
+    state['retrieval_count'] = state.get('retrieval_count', 0) + 1
+
+    sources, contents = await web_search(entity)
+    appended = _append_new_items(state, sources, contents)
+    state['log'].append(f"SUCCESS: Retrieved {appended} new items using web_search.")
     return state
 
 
-def orchestrator_node(state: InvestigationState) -> InvestigationState:
-    """Decides the next tool to use based on the current state."""
+async def orchestrator_node(state: InvestigationState) -> InvestigationState:
+    """Decides the next tool calls and executes the independent ones in parallel."""
     state['log'].append("INFO: Orchestrator deciding next step...")
     state['retrieval_count'] = state.get('retrieval_count', 0) + 1
     state['log'].append(f"INFO: --- Investigation Step #{state['retrieval_count']} ---")
 
+    # Turn-0 shotgun: before any data exists there is no analysis for the LLM
+    # to reason over, so tool selection would be a guess anyway. Fan out every
+    # tool on the primary entity in parallel instead - this skips one full LLM
+    # round trip and overlaps all four tool latencies on the cold path.
+    if state['retrieval_count'] == 1:
+        entity = state['entities'][0] if state.get('entities') else _entity_record(state['query'])
+        state['log'].append(f"INFO: First turn - fanning out all tools for '{entity['name']}'.")
+        results = await asyncio.gather(
+            *(
+                tool(entity['name'], entity['handle'])
+                if tool_name == 'social_media_search' else tool(entity['name'])
+                for tool_name, tool in AVAILABLE_TOOLS.items()
+            ),
+            return_exceptions=True,
+        )
+        for tool_name, retrieved_info in zip(AVAILABLE_TOOLS, results):
+            if isinstance(retrieved_info, Exception):
+                state['log'].append(f"ERROR: Tool '{tool_name}' failed: {retrieved_info}")
+                continue
+            appended = _append_new_items(state, *retrieved_info)
+            state['log'].append(f"SUCCESS: Retrieved {appended} new items using {tool_name}.")
+        state['tool_cache_stats'] = tool_cache_stats()
+        return state
+
     # The first query should come from the initial prompt, not a follow-up
     if not state.get('follow_up_queries'):
         queries_for_prompt = [state['query']]
     else:
         queries_for_prompt = state.get('follow_up_queries')
 
-    prompt = PromptTemplate(
-        template=ORCHESTRATOR_PROMPT,
-        input_variables=["query", "analysis", "follow_up_queries"],
-        partial_variables={"tool_names": ", ".join(AVAILABLE_TOOLS.keys())}
-    )
-    chain = prompt | claude_sonnet | JsonOutputParser()
-    
     try:
-        result = chain.invoke({
-            "query": state['query'],
-            "analysis": state['analysis'],
-            "follow_up_queries": queries_for_prompt
-        })
-        
-        tool_name = result['tool_name']
-        query = result['query']
-        
-        if tool_name not in AVAILABLE_TOOLS:
-            raise ValueError(f"Invalid tool '{tool_name}' selected.")
+        result = await ORCHESTRATOR_CHAIN.ainvoke([
+            ORCHESTRATOR_SYSTEM,
+            HumanMessage(content=render_orchestrator_dynamic(
+                state['query'], state['analysis'], str(queries_for_prompt)
+            ))
+        ])
+
+        # Cap the batch: beyond a few calls per cycle the extra queries are
+        # usually rephrasings, and each one costs tool latency and quota.
+        # Tool names are schema-enforced (Literal in OrchestratorCall), so no
+        # validity check is needed here.
+        tool_calls = result.tool_calls[:_MAX_TOOL_CALLS_PER_STEP]
+        if not tool_calls:
+            raise ValueError("Orchestrator returned no tool calls.")
+
+        for call in tool_calls:
+            state['log'].append(f"INFO: Orchestrator chose tool '{call.tool_name}' with query '{call.query}'")
+
+        # The tool calls are independent, so run them concurrently; the tools
+        # are async coroutines, so gather overlaps their network latency.
+        coros = [
+            AVAILABLE_TOOLS[call.tool_name](call.query)
+            for call in tool_calls
+        ]
+        results = await asyncio.gather(*coros, return_exceptions=True)
+
+        for call, retrieved_info in zip(tool_calls, results):
+            if isinstance(retrieved_info, Exception):
+                state['log'].append(f"ERROR: Tool '{call.tool_name}' failed: {retrieved_info}")
+                continue
+            appended = _append_new_items(state, *retrieved_info)
+            state['log'].append(f"SUCCESS: Retrieved {appended} new items using {call.tool_name}.")
+
+        state['tool_cache_stats'] = tool_cache_stats()
 
-        state['log'].append(f"INFO: Orchestrator chose tool '{tool_name}' with query '{query}'")
-        
-        tool_function = AVAILABLE_TOOLS[tool_name]
-        retrieved_info = tool_function(query)
-        state['retrieved_data'].extend(retrieved_info)
-        state['log'].append(f"SUCCESS: Retrieved {len(retrieved_info)} items using {tool_name}.")
-            
     except Exception as e:
         state['log'].append(f"ERROR: Orchestrator failed: {e}. Falling back to web search.")
         fallback_query = state['query']
-        fallback_info = web_search(fallback_query)
-        state['retrieved_data'].extend(fallback_info)
-        state['log'].append(f"INFO: Fallback web_search retrieved {len(fallback_info)} items.")
+        fallback_sources, fallback_contents = await web_search(fallback_query)
+        appended = _append_new_items(state, fallback_sources, fallback_contents)
+        state['log'].append(f"INFO: Fallback web_search retrieved {appended} new items.")
     
     return state
 
 
-def pivot_agent_node(state: InvestigationState) -> InvestigationState:
-    """Analyzes retrieved data and suggests next steps."""
+async def _maybe_compact_retrieved(state: InvestigationState) -> None:
+    """Folds the oldest analyzed snippets into a digest when over budget.
+
+    Without this, the cleaner's context grows linearly with retrieval_count.
+    Only items the analyst has already seen are compacted (the running
+    `analysis` retains their conclusions), so the delta the analyst is about
+    to read is never disturbed. Claude Sonnet does the one-shot digest - the
+    cheap model is fine for lossy condensation the cleaner re-verifies.
+    """
+    contents = state['retrieved_contents']
+    if _estimate_tokens("\n".join(contents)) <= _CONTEXT_TOKEN_BUDGET:
+        return
+    k = min(len(contents) // 2, state.get('last_seen_idx', 0))
+    if k < 2:
+        return
+    try:
+        digest = await claude_sonnet.ainvoke([
+            HumanMessage(content=COMPACTION_PROMPT + "\n---\n".join(contents[:k]))
+        ])
+        summary = digest.content if isinstance(digest.content, str) else str(digest.content)
+    except Exception as e:
+        state['log'].append(f"WARNING: Context compaction failed, keeping full history: {e}")
+        return
+    state['retrieved_sources'][:k] = ["summary"]
+    state['retrieved_contents'][:k] = [summary]
+    state['last_seen_idx'] = state['last_seen_idx'] - (k - 1)
+    state['context_compacted'] = True
+    state['log'].append(f"INFO: Compacted {k} oldest snippets into a summary digest.")
+
+
+async def pivot_agent_node(state: InvestigationState) -> InvestigationState:
+    """Analyzes newly retrieved data and suggests next steps."""
     state['log'].append("INFO: Pivot agent analyzing new data...")
-    
-    # Format the most recent data for the analyst
-    # This logic needs to be careful not to re-process old data.
-    # A simple way is to pass only the newest items. Let's assume the calling
-    # logic handles what's "new", but here we will just format all data.
-    context_str = "\n---\n".join([item['content'] for item in state['retrieved_data'] if item.get('content')])
-
-    prompt = PromptTemplate(
-        template=ANALYST_PROMPT, 
-        input_variables=["query", "context", "analysis"]
-    )
-    chain = prompt | gpt_4o | JsonOutputParser()
-    
+
+    await _maybe_compact_retrieved(state)
+
+    # Only format the items retrieved since the last analyst pass; the running
+    # `analysis` (carried server-side via previous_response_id) is the stable,
+    # already-cached prefix of the conversation, and this delta is the only
+    # uncached tail each call pays full rate for. Resending the full history
+    # made input tokens grow quadratically over the investigation.
+    last_seen = state.get('last_seen_idx', 0)
+    context_str = "\n---\n".join(state['retrieved_contents'][last_seen:])
+
+    human = HumanMessage(content=render_analyst_dynamic(
+        state['query'], state['analysis'], context_str
+    ))
+
     try:
-        result = chain.invoke({
-            "query": state['query'],
-            "context": context_str,
-            "analysis": state['analysis']
-        })
-        
+        prev_id = state.get('last_response_id')
+        if prev_id:
+            # The server-side conversation already holds the system prompt and
+            # every earlier turn, so only the new turn is sent.
+            try:
+                ai_msg = await gpt_4o.ainvoke([human], previous_response_id=prev_id)
+            except Exception as e:
+                # The referenced response may have expired server-side; fall
+                # back to a fresh full-context turn.
+                state['log'].append(f"WARNING: previous_response_id rejected ({e}). Resending full context.")
+                ai_msg = await gpt_4o.ainvoke([ANALYST_SYSTEM, human])
+        else:
+            ai_msg = await gpt_4o.ainvoke([ANALYST_SYSTEM, human])
+        state['last_response_id'] = ai_msg.response_metadata.get('id') or None
+        result = ANALYST_PARSER.invoke(ai_msg)
+
         state['analysis'] = result.get('analysis', state['analysis'])
         state['follow_up_queries'] = result.get('follow_up_queries', [])
-            
+
+        # Advance the delta cursor only once the batch has actually been
+        # analyzed; on failure the same items are re-presented next pass
+        # instead of silently dropping out of the analysis forever.
+        state['last_seen_idx'] = len(state['retrieved_contents'])
+
         state['log'].append("SUCCESS: Pivot agent updated analysis and follow-up queries.")
     except Exception as e:
         state['log'].append(f"ERROR: Pivot agent failed: {e}")
@@ -167,19 +457,19 @@ def pivot_agent_node(state: InvestigationState) -> InvestigationState:
 
 # --- Reporting & Verification Nodes (Moved from graph.py) ---
 
-def cleaner_node(state: InvestigationState) -> InvestigationState:
+async def cleaner_node(state: InvestigationState) -> InvestigationState:
     """Cleans data and resolves entities into distinct profiles using Gemini 1.5 Pro."""
     state['log'].append("INFO: Skeptical cleaner resolving entities...")
     
     try:
-        context_str = "\n---\n".join([item['content'] for item in state['retrieved_data'] if item.get('content')])
+        contents = _collapse_near_duplicates([
+            _compact_content(content) for content in state['retrieved_contents']
+        ])
+        context_str = "\n---\n".join(contents)
         if not context_str:
             raise ValueError("No content to clean.")
 
-        prompt = ChatPromptTemplate.from_template(CLEANER_PROMPT)
-        chain = prompt | gemini_1_5 | JsonOutputParser()
-        
-        result = chain.invoke({"query": state['query'], "context": context_str})
+        result = await CLEANER_CHAIN.ainvoke({"query": state['query'], "context": context_str})
         
         state['cleaned_data'] = result
         state['log'].append("SUCCESS: Data cleaned and entities resolved.")
@@ -192,22 +482,36 @@ def cleaner_node(state: InvestigationState) -> InvestigationState:
     return state
 
 
-def report_writer_node(state: InvestigationState) -> InvestigationState:
-    """Generates the final report from structured profiles using Gemini 1.5 Pro."""
+async def report_writer_node(state: InvestigationState) -> InvestigationState:
+    """Generates the final report from structured profiles using Gemini 1.5 Pro.
+
+    Tokens are streamed out as custom graph events so the client sees the
+    report build up instead of waiting for the full generation to finish.
+    """
     state['log'].append("INFO: Generating draft report...")
-    
+
     try:
         if not state.get('cleaned_data') or not state.get('cleaned_data').get('profiles'):
              raise ValueError("No structured profiles for report generation")
 
-        prompt = ChatPromptTemplate.from_template(FINAL_REPORT_PROMPT)
-        chain = prompt | gemini_1_5 | StrOutputParser()
-        
-        report_str = chain.invoke({
+        # Warm the judge's prompt cache with the cleaned data while the writer
+        # streams; the judge's prefill overlaps with Gemini decode. The task
+        # reference must be held somewhere - the event loop only keeps weak
+        # references, so a bare fire-and-forget task can be collected
+        # mid-flight.
+        prefill_task = asyncio.create_task(_judge_prefill(_compact_json(state['cleaned_data'])))
+        _BACKGROUND_TASKS.add(prefill_task)
+        prefill_task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+        stream_writer = get_stream_writer()
+        report_str = ""
+        async for token in REPORT_WRITER_CHAIN.astream({
             "query": state['query'],
-            "cleaned_data": json.dumps(state['cleaned_data'], indent=2)
-        })
-        
+            "cleaned_data": _compact_json(state['cleaned_data'])
+        }):
+            report_str += token
+            stream_writer({"report_delta": token})
+
         state['final_report'] = report_str
         state['log'].append("SUCCESS: Draft report generated.")
         
@@ -219,23 +523,67 @@ def report_writer_node(state: InvestigationState) -> InvestigationState:
     return state
 
 
-def judge_agent_node(state: InvestigationState) -> InvestigationState:
-    """Final quality check on the report's accuracy using Claude Opus."""
-    state['log'].append("INFO: Judge agent (Claude Opus) reviewing report for accuracy...")
+# Strong references to in-flight fire-and-forget tasks (currently just the
+# judge prefill); each task removes itself once done.
+_BACKGROUND_TASKS: set = set()
 
-    prompt = ChatPromptTemplate.from_template(JUDGE_PROMPT)
-    judge_chain = prompt | claude_opus | JsonOutputParser()
 
+def _judge_prefix_messages(cleaned_data_json: str) -> list:
+    """Builds the judge prompt prefix up to (and including) the cleaned data.
+
+    The cleaned-data block carries its own cache breakpoint so a prefill call
+    and the real judge call share the cached prefix.
+    """
+    return [
+        JUDGE_SYSTEM,
+        HumanMessage(content=[{
+            "type": "text",
+            "text": render_judge_cleaned_data(cleaned_data_json),
+            "cache_control": {"type": "ephemeral"},
+        }]),
+    ]
+
+
+async def _judge_prefill(cleaned_data_json: str) -> None:
+    """Warms Claude's prompt cache with the judge prefix.
+
+    Fired as a background task when the report writer starts, so the draft
+    judge's prefill happens while Gemini is still decoding the report. Goes
+    through JUDGE_PREFILL_MODEL so its tools + system + messages prefix is
+    identical to the draft judge's. Best-effort: on any failure the real
+    judge call simply pays the full prefill cost.
+    """
     try:
-        result = judge_chain.invoke({
-            "cleaned_data": json.dumps(state['cleaned_data'], indent=2),
-            "final_report": state['final_report']
-        })
+        await JUDGE_PREFILL_MODEL.ainvoke(_judge_prefix_messages(cleaned_data_json))
+    except Exception:
+        pass
 
-        if result.get("is_accurate") is True:
+
+async def judge_agent_node(state: InvestigationState) -> InvestigationState:
+    """Final quality check on the report's accuracy.
+
+    Claude Sonnet drafts the verdict; Claude Opus is only consulted when the
+    draft rejects the report, so the slow, expensive model stays off the
+    common (approval) path.
+    """
+    state['log'].append("INFO: Judge agent reviewing report for accuracy...")
+
+    try:
+        messages = _judge_prefix_messages(_compact_json(state['cleaned_data'])) + [
+            HumanMessage(content=render_judge_report(state['final_report']))
+        ]
+        verdict = await JUDGE_DRAFT_CHAIN.ainvoke(messages)
+
+        if not verdict.is_accurate:
+            # Escalate: confirm the rejection with the high-accuracy model
+            # before failing the report over a draft-judge false alarm.
+            state['log'].append("INFO: Draft judge rejected report. Escalating to Claude Opus...")
+            verdict = await JUDGE_ESCALATION_CHAIN.ainvoke(messages)
+
+        if verdict.is_accurate:
             state['log'].append("SUCCESS: Judge approves the report quality.")
         else:
-            reason = result.get('reasoning', 'No reason provided.')
+            reason = verdict.reasoning or 'No reason provided.'
             state['log'].append(f"WARNING: Judge REJECTED report. Reason: {reason}")
             state['final_report'] = f"REPORT FAILED QUALITY CHECK\n\nREASON: {reason}\n\n---ORIGINAL DRAFT---\n{state['final_report']}"
             
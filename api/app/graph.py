@@ -1,26 +1,55 @@
 # In api/app/graph.py
 
-import json
-from typing import List, Literal
+from typing import Literal
 from langgraph.graph import StateGraph, END
 from . import agents
 from .types import InvestigationState
 
 # --- Graph Definition ---
+def complexity_router(state: InvestigationState) -> Literal["simple", "complex"]:
+    """Routes trivially single-entity queries around the investigation loop.
+
+    If the query is nothing but one entity name, the full orchestrate/analyze
+    loop adds latency without adding information - one direct tool call
+    followed by cleaner/writer/judge is enough.
+    """
+    # An extraction failure also leaves entities == [query]; that is a
+    # degraded state, not a simple query, so it stays on the full loop.
+    if state.get("entity_extraction_failed"):
+        return "complex"
+    entities = state.get("entities", [])
+    if len(entities) == 1 and entities[0]["name"].strip().lower() == state.get("query", "").strip().lower():
+        print("[DEBUG] Simple single-entity query: taking the short path")
+        return "simple"
+    return "complex"
+
+
+def predicted_step_budget(state: InvestigationState) -> int:
+    """Estimates how many retrieval steps this investigation should get.
+
+    Single-entity investigations rarely benefit from the full loop, so they
+    get a small budget; each extra entity to de-conflict buys more steps, up
+    to the hard limit of 15.
+    """
+    n_entities = max(len(state.get("entities", [])), 1)
+    return min(15, 6 + 3 * (n_entities - 1))
+
+
 def should_continue(state: InvestigationState) -> Literal["continue", "end"]:
     """Determines whether the investigation should continue or end."""
     retrieval_count = state.get("retrieval_count", 0)
     follow_up_queries = state.get("follow_up_queries", [])
-    retrieved_data = state.get("retrieved_data", [])
-    
-    if retrieval_count >= 15:
-        print("[DEBUG] Ending investigation: hit hard limit of 15 retrievals")
+    retrieved_contents = state.get("retrieved_contents", [])
+
+    budget = predicted_step_budget(state)
+    if retrieval_count >= budget:
+        print(f"[DEBUG] Ending investigation: hit step budget of {budget} retrievals")
         return "end"
         
-    valid_data = [item for item in retrieved_data if isinstance(item, dict) and item.get('content')]
-    
-    if len(valid_data) >= 8:
-        print(f"[DEBUG] Ending investigation: sufficient quality data collected ({len(valid_data)} valid items)")
+    # Appended contents are already validated and deduplicated, so the count
+    # is the count of usable items.
+    if len(retrieved_contents) >= 8:
+        print(f"[DEBUG] Ending investigation: sufficient quality data collected ({len(retrieved_contents)} valid items)")
         return "end"
         
     if not follow_up_queries:
@@ -34,14 +63,23 @@ def should_continue(state: InvestigationState) -> Literal["continue", "end"]:
 workflow = StateGraph(InvestigationState)
 
 # Add the nodes by referencing the functions in agents.py
-workflow.add_node("orchestrator", agents.orchestrator)  # Uses the new wrapper
+workflow.add_node("query_analysis", agents.query_analysis_node)
+workflow.add_node("single_tool", agents.single_tool_node)
+workflow.add_node("orchestrator", agents.orchestrator_node)
 workflow.add_node("analyst", agents.pivot_agent_node)
 workflow.add_node("cleaner", agents.cleaner_node)
 workflow.add_node("writer", agents.report_writer_node)
 workflow.add_node("judge", agents.judge_agent_node)
 
-# Build the graph
-workflow.set_entry_point("orchestrator")
+# Build the graph. Entity extraction runs once up front; trivially simple
+# queries short-circuit the investigation loop entirely.
+workflow.set_entry_point("query_analysis")
+workflow.add_conditional_edges(
+    "query_analysis",
+    complexity_router,
+    {"simple": "single_tool", "complex": "orchestrator"}
+)
+workflow.add_edge("single_tool", "cleaner")
 workflow.add_edge("orchestrator", "analyst")
 workflow.add_conditional_edges(
     "analyst",
@@ -1,134 +1,283 @@
-from fastapi import FastAPI, Request, BackgroundTasks
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from sse_starlette.sse import EventSourceResponse
-import asyncio
-import uuid
-import json
-import traceback
-import sys
-
-from .graph import app as graph_app # The compiled LangGraph app
-
-app = FastAPI()
-
-# In-memory store for stream events. In a real-world scenario,
-# you might use Redis or another message queue.
-STREAMS = {}
-
-# CORS middleware to allow frontend to connect
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-    expose_headers=["X-Thread-ID"], # Expose custom header
-)
-
-async def run_investigation_and_store_results(thread_id: str, initial_state: dict, config: dict):
-    """Runs the graph and stores each chunk in the in-memory STREAMS dict."""
-    STREAMS[thread_id] = []
-    final_report = ""
-    try:
-        print("[DEBUG] Starting investigation with initial state:", json.dumps(initial_state, indent=2))
-        
-        # Set a higher recursion limit for this investigation
-        old_limit = sys.getrecursionlimit()
-        sys.setrecursionlimit(2000)  # Set a higher limit
-        
-        try:
-            async for chunk in graph_app.astream(initial_state, config=config, stream_mode="values"):
-                log_entry = chunk["log"][-1]
-                print(f"[DEBUG] Investigation chunk: {log_entry}")
-                print(f"[DEBUG] Current state: {json.dumps(chunk, indent=2)}")
-                STREAMS[thread_id].append({"data": json.dumps({"log": log_entry})})
-                final_report = chunk.get("final_report", "")
-        finally:
-            # Restore the original recursion limit
-            sys.setrecursionlimit(old_limit)
-            
-        # After the loop, add the final report
-        if not final_report:
-            final_report = "ERROR: No final report generated."
-            print("[ERROR] No final report generated by investigation.")
-            print("[DEBUG] Final state:", json.dumps(chunk, indent=2))
-        else:
-            print("[DEBUG] Final report successfully generated.")
-        STREAMS[thread_id].append({"data": json.dumps({"report": final_report})})
-    except Exception as e:
-        error_message = f"ERROR: An error occurred during investigation: {e}\n{traceback.format_exc()}"
-        print(error_message)
-        STREAMS[thread_id].append({"data": json.dumps({"log": error_message})})
-        # Always send a final report, even if error
-        STREAMS[thread_id].append({"data": json.dumps({"report": "ERROR: Investigation failed. See logs for details."})})
-    finally:
-        # Add a special event to signal the end of the stream
-        print("[DEBUG] Investigation stream ended.")
-        STREAMS[thread_id].append({"event": "end"})
-
-
-@app.post("/investigate")
-async def investigate(request: Request, background_tasks: BackgroundTasks):
-    data = await request.json()
-    query = data.get("query")
-    
-    if not query:
-        return JSONResponse(status_code=400, content={"message": "Query is required."})
-
-    thread_id = str(uuid.uuid4())
-    
-    # The 'configurable' key is at the top level. This is what the checkpointer uses.
-    config = {
-        "configurable": {
-            "thread_id": thread_id
-        }
-    }
-    
-    # We start with an empty follow_up_queries list. The orchestrator's first
-    # job is to generate the first real query from the main `query`.
-    initial_state = {
-        "query": query,
-        "entities": [],
-        "plan": "",
-        "retrieved_data": [],
-        "log": [f"START: Beginning investigation for query: {query}"],
-        "analysis": "No analysis yet.",
-        "follow_up_queries": [], # Start empty
-        "retrieval_count": 0,
-        "cleaned_data": {}, # Ensure this matches the type in types.py
-        "final_report": ""
-    }
-    
-    # Run the long-running graph in the background
-    background_tasks.add_task(run_investigation_and_store_results, thread_id, initial_state, config)
-    
-    # Immediately return the thread_id so the client can connect to the stream
-    return JSONResponse(
-        content={"message": "Investigation started.", "thread_id": thread_id},
-        headers={"X-Thread-ID": thread_id}
-    )
-
-@app.get("/stream/{thread_id}")
-async def stream_events(thread_id: str):
-    async def event_generator():
-        last_sent_index = 0
-        while True:
-            # Check for new events
-            if thread_id in STREAMS and len(STREAMS[thread_id]) > last_sent_index:
-                for i in range(last_sent_index, len(STREAMS[thread_id])):
-                    event = STREAMS[thread_id][i]
-                    if event.get("event") == "end":
-                        yield {"event": "close"} # SSE close signal
-                        del STREAMS[thread_id] # Clean up
-                        return
-                    yield event
-                last_sent_index = len(STREAMS[thread_id])
-            
-            # If the stream is closed from the other end, exit
-            if thread_id not in STREAMS:
-                return
-
-            await asyncio.sleep(0.5)
-
-    return EventSourceResponse(event_generator())
+from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi.responses import JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+from sse_starlette.sse import EventSourceResponse
+import asyncio
+import os
+import uuid
+import traceback
+
+import orjson
+
+from .graph import app as graph_app # The compiled LangGraph app
+from .tools import open_tool_cache, close_http_session
+
+
+def _dumps(obj) -> str:
+    """Serializes an event payload with orjson (measurably faster than the
+    stdlib json on the per-chunk SSE path)."""
+    return orjson.dumps(obj).decode()
+
+
+app = FastAPI()
+
+# Optional Redis Streams backend. When REDIS_URL is set, events go through
+# Redis so the API can run with multiple replicas (/investigate and
+# /stream/{thread_id} may land on different workers) and clients can resume a
+# stream after reconnecting via the SSE Last-Event-ID header. Without it,
+# events stay in per-process asyncio queues.
+try:
+    import redis.asyncio as redis_async
+except ImportError:
+    redis_async = None
+
+REDIS_URL = os.environ.get("REDIS_URL")
+if REDIS_URL and redis_async is not None:
+    redis_client = redis_async.from_url(REDIS_URL, decode_responses=True)
+    print("INFO: Using Redis Streams event backend")
+else:
+    redis_client = None
+    if REDIS_URL:
+        print("WARNING: REDIS_URL set but the redis package is not installed. Using in-process queues.")
+
+# Cap on retained events per thread; old entries are trimmed first.
+STREAM_MAXLEN = 1000
+
+# How long an in-process stream with no connected client may live before its
+# events are discarded (e.g. the client never opened /stream/{thread_id}).
+STREAM_TTL_SECONDS = 600
+
+# Concurrency bins for investigations. Queries naming a single subject finish
+# in a few steps; multi-subject queries can run the full loop. Giving each bin
+# its own semaphore keeps a handful of long investigations from serializing
+# all the short ones behind them.
+SHORT_QUERY_MAX_WORDS = 6
+SHORT_INVESTIGATIONS = asyncio.Semaphore(8)
+LONG_INVESTIGATIONS = asyncio.Semaphore(4)
+
+
+def _investigation_semaphore(query: str) -> asyncio.Semaphore:
+    """Picks the concurrency bin from the query's predicted complexity."""
+    if len(query.split()) <= SHORT_QUERY_MAX_WORDS:
+        return SHORT_INVESTIGATIONS
+    return LONG_INVESTIGATIONS
+
+# In-memory store mapping thread_id -> asyncio.Queue of stream events, used
+# when no Redis backend is configured. The queue lets the SSE endpoint await
+# new events instead of polling.
+STREAMS = {}
+
+# thread_ids with a currently connected SSE client (in-process backend only).
+ACTIVE_CONSUMERS = set()
+
+
+def _stream_key(thread_id: str) -> str:
+    return f"stream:{thread_id}"
+
+
+def _register_stream(thread_id: str):
+    """Creates the in-process queue for a thread and arms its TTL timer.
+
+    Without the timer, an investigation whose client never connects (or
+    disconnects without seeing the end event) would leak its queue and every
+    event in it forever.
+    """
+    STREAMS[thread_id] = asyncio.Queue()
+    asyncio.get_running_loop().call_later(STREAM_TTL_SECONDS, _expire_stream, thread_id)
+
+
+def _expire_stream(thread_id: str):
+    """Drops an abandoned stream; reschedules while a client is connected."""
+    if thread_id in ACTIVE_CONSUMERS:
+        asyncio.get_running_loop().call_later(STREAM_TTL_SECONDS, _expire_stream, thread_id)
+        return
+    if STREAMS.pop(thread_id, None) is not None:
+        print(f"[DEBUG] Expired abandoned stream {thread_id}")
+
+
+async def publish_event(thread_id: str, event: dict):
+    """Publishes one SSE event to the thread's stream (Redis or in-process)."""
+    if redis_client is not None:
+        await redis_client.xadd(
+            _stream_key(thread_id),
+            {"payload": _dumps(event)},
+            maxlen=STREAM_MAXLEN,
+            approximate=True,
+        )
+        # Keep abandoned streams from living forever server-side.
+        await redis_client.expire(_stream_key(thread_id), 3600)
+        return
+
+    events = STREAMS.get(thread_id)
+    if events is None:
+        # The stream expired (abandoned) - drop the event instead of
+        # accumulating it with nobody left to consume it.
+        return
+    # Bound queue growth during runaway loops: shed the oldest events first.
+    while events.qsize() >= STREAM_MAXLEN:
+        try:
+            events.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+    await events.put(event)
+
+# CORS middleware to allow frontend to connect
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Thread-ID"], # Expose custom header
+)
+
+@app.on_event("shutdown")
+async def _close_http_session():
+    """Releases the pooled Tavily connections on server shutdown."""
+    await close_http_session()
+
+
+async def run_investigation_and_store_results(thread_id: str, initial_state: dict, config: dict):
+    """Runs the graph and publishes each chunk to the thread's event stream."""
+    if redis_client is None:
+        _register_stream(thread_id)
+    # Bind a fresh memoization cache to this task's context: tool results
+    # neither leak in from other investigations nor get wiped out from under
+    # the concurrent ones, and the cache dies with the task.
+    open_tool_cache()
+    final_report = ""
+    try:
+        print("[DEBUG] Starting investigation with initial state:", _dumps(initial_state))
+
+        # "values" carries the evolving state; "custom" carries token deltas
+        # emitted by the report writer while Gemini is still decoding.
+        # recursion_limit is LangGraph's own cap on graph super-steps (the
+        # loop can revisit orchestrator/analyst many times) - it has nothing
+        # to do with Python's recursion limit, since LangGraph executes
+        # iteratively.
+        async with _investigation_semaphore(initial_state["query"]):
+            async for mode, chunk in graph_app.astream(initial_state, config={**config, "recursion_limit": 50}, stream_mode=["values", "custom"]):
+                if mode == "custom":
+                    await publish_event(thread_id, {"data": _dumps(chunk)})
+                    continue
+                log_entry = chunk["log"][-1]
+                print(f"[DEBUG] Investigation chunk: {log_entry}")
+                await publish_event(thread_id, {"data": _dumps({"log": log_entry})})
+                final_report = chunk.get("final_report", "")
+
+        # After the loop, add the final report
+        if not final_report:
+            final_report = "ERROR: No final report generated."
+            print("[ERROR] No final report generated by investigation.")
+            print("[DEBUG] Final state:", _dumps(chunk))
+        else:
+            print("[DEBUG] Final report successfully generated.")
+        await publish_event(thread_id, {"data": _dumps({"report": final_report})})
+    except Exception as e:
+        error_message = f"ERROR: An error occurred during investigation: {e}\n{traceback.format_exc()}"
+        print(error_message)
+        await publish_event(thread_id, {"data": _dumps({"log": error_message})})
+        # Always send a final report, even if error
+        await publish_event(thread_id, {"data": _dumps({"report": "ERROR: Investigation failed. See logs for details."})})
+    finally:
+        # Add a special event to signal the end of the stream
+        print("[DEBUG] Investigation stream ended.")
+        await publish_event(thread_id, {"event": "end"})
+
+
+@app.post("/investigate")
+async def investigate(request: Request, background_tasks: BackgroundTasks):
+    data = await request.json()
+    query = data.get("query")
+    
+    if not query:
+        return JSONResponse(status_code=400, content={"message": "Query is required."})
+
+    thread_id = str(uuid.uuid4())
+    
+    # The 'configurable' key is at the top level. This is what the checkpointer uses.
+    config = {
+        "configurable": {
+            "thread_id": thread_id
+        }
+    }
+    
+    # We start with an empty follow_up_queries list. The orchestrator's first
+    # job is to generate the first real query from the main `query`.
+    initial_state = {
+        "query": query,
+        "entities": [],
+        "entity_extraction_failed": False,
+        "plan": "",
+        "retrieved_sources": [],
+        "retrieved_contents": [],
+        "content_hashes": [],
+        "last_seen_idx": 0,
+        "context_compacted": False,
+        "log": [f"START: Beginning investigation for query: {query}"],
+        "analysis": "No analysis yet.",
+        "last_response_id": None,
+        "follow_up_queries": [], # Start empty
+        "retrieval_count": 0,
+        "cleaned_data": {}, # Ensure this matches the type in types.py
+        "final_report": ""
+    }
+    
+    # Run the long-running graph in the background
+    background_tasks.add_task(run_investigation_and_store_results, thread_id, initial_state, config)
+    
+    # Immediately return the thread_id so the client can connect to the stream
+    return JSONResponse(
+        content={"message": "Investigation started.", "thread_id": thread_id},
+        headers={"X-Thread-ID": thread_id}
+    )
+
+@app.get("/stream/{thread_id}")
+async def stream_events(thread_id: str, request: Request):
+    async def redis_event_generator():
+        # Resume from the client's Last-Event-ID on reconnect, else replay
+        # the whole stream from the beginning.
+        last_id = request.headers.get("last-event-id") or "0"
+        key = _stream_key(thread_id)
+        while True:
+            entries = await redis_client.xread({key: last_id}, block=5000)
+            if not entries:
+                continue
+            for entry_id, fields in entries[0][1]:
+                last_id = entry_id
+                event = orjson.loads(fields["payload"])
+                if event.get("event") == "end":
+                    yield {"event": "close"} # SSE close signal
+                    await redis_client.delete(key) # Clean up
+                    return
+                event["id"] = entry_id
+                yield event
+
+    async def queue_event_generator():
+        # The background task may not have created the queue yet when the
+        # client connects; give it a moment before giving up.
+        for _ in range(20):
+            if thread_id in STREAMS:
+                break
+            await asyncio.sleep(0.1)
+        else:
+            return
+
+        events = STREAMS[thread_id]
+        ACTIVE_CONSUMERS.add(thread_id)
+        try:
+            while True:
+                event = await events.get()
+                if event.get("event") == "end":
+                    yield {"event": "close"} # SSE close signal
+                    return
+                yield event
+        finally:
+            # Runs on normal close and on client disconnect (the generator is
+            # closed / CancelledError is raised) - either way, free the queue.
+            ACTIVE_CONSUMERS.discard(thread_id)
+            STREAMS.pop(thread_id, None)
+
+    if redis_client is not None:
+        return EventSourceResponse(redis_event_generator())
+    return EventSourceResponse(queue_event_generator())
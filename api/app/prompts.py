@@ -1,159 +1,227 @@
-# In api/app/prompts.py
-
-# --- Investigation Loop Prompts ---
-
-RESEARCHER_PROMPT = """
-You are a world-class OSINT Query Analysis Agent. Your sole responsibility is to parse the user's raw query and extract the primary investigative entities.
-
-User Query: "{query}"
-
-Based on the query, identify the main person, organization, location, or event to be investigated.
-Output a JSON object with a single key 'entities', which is a list of strings.
-Example:
-User Query: "Find out about Ali Khaledi Nasab"
-Output: {{"entities": ["Ali Khaledi Nasab"]}}
-"""
-
-ORCHESTRATOR_PROMPT = """
-You are a master OSINT Orchestration Agent. Based on the current state of the investigation, your job is to select the single best tool and query to execute next to advance the investigation.
-
-**Current State of Investigation:**
-- **Initial Query:** {query}
-- **High-Level Analysis:** {analysis}
-- **Suggested Follow-up Questions:** {follow_up_queries}
-
-**Available Tools:** {tool_names}
-
-**Your Task:**
-Review the 'Suggested Follow-up Questions' and the 'High-Level Analysis'. Choose the single best tool from 'Available Tools' to answer one of the most promising follow-up questions. Formulate a precise query for that tool.
-
-**CRITICAL:** You must ONLY output a valid JSON object. Do not include ANY explanatory text or analysis.
-The JSON object must have exactly these two keys:
-1. "tool_name": The name of the single tool to call next (must be one of: {tool_names}).
-2. "query": The specific, concise query to pass to that tool.
-
-**Example Output:**
-{{"tool_name": "social_media_search", "query": "Ali Khaledi Nasab LinkedIn profile"}}
-"""
-
-ANALYST_PROMPT = """
-You are an expert OSINT Pivot Agent. Your role is to analyze all data collected so far, synthesize it, identify gaps, and suggest the next concrete steps.
-
-**Initial Query:** {query}
-**Existing Analysis:** {analysis}
-**All Collected Data (Context):**
----
-{context}
----
-
-**Your Tasks:**
-1.  **Synthesize:** Briefly update the `Existing Analysis` with any new, key information from the `All Collected Data`.
-2.  **Identify Gaps:** What crucial information is still missing to create a complete profile on '{query}'?
-3.  **Suggest Follow-ups:** Generate a list of up to 3 specific, targeted follow-up search queries that would address these gaps. If the investigation seems complete or has hit a dead end, return an empty list.
-
-**Output a JSON object with two keys:**
-1. "analysis": A concise summary (2-3 sentences) of the current state of the investigation.
-2. "follow_up_queries": A list of strings for the next search queries. Return an empty list `[]` to end the investigation.
-"""
-
-
-# --- Reporting & Verification Prompts (The "Skeptical" Architecture) ---
-
-CLEANER_PROMPT = """
-You are an expert OSINT analyst specializing in entity resolution. Your task is to analyze a batch of raw text about a target, "{query}", identify if the data points to one or multiple individuals, and then structure the verified information.
-
----RAW CONTEXT---
-{context}
----
-
-**Your Task & Critical Rules:**
-1.  **Assume Conflation:** Start with the assumption that the data may contain information about SEVERAL different people with similar names. Your primary goal is to separate them.
-2.  **Identify Contradictions:** Look for contradictions in timelines, professions, and locations.
-3.  **Create Profiles:** For each distinct individual you identify, create a separate profile.
-4.  **Assign Confidence:** For each profile, assign a `confidence_score` from 0.0 to 1.0.
-5.  **Structure the Output:** Your output **MUST** be a single, valid JSON object with a single key, "profiles".
-
-**Example JSON Output (Do not copy the structure literally, use it as a guide):**
-{{
-  "profiles": [
-    {{
-      "confidence_score": 0.95,
-      "profile_name": "AI Researcher Ali Khaledi",
-      "summary": "An AI researcher with a PhD from Stanford, previously at Amazon.",
-      "supporting_facts": [
-        "Affiliated with Stanford University as a Post-Doc in Neurosurgery.",
-        "Listed as a 'Research Scientist at QuantumLeap Inc.' on LinkedIn."
-      ]
-    }},
-    {{
-      "confidence_score": 0.40,
-      "profile_name": "Artist Ali Khaledi",
-      "summary": "An established Iranian graphic designer and artist.",
-      "supporting_facts": [
-        "Served as general secretary of the 8th Tehran International Poster Biennial.",
-        "Affiliated with the Iranian Graphic Designers Society (IGDS)."
-      ]
-    }}
-  ]
-}}
-"""
-
-FINAL_REPORT_PROMPT = """
-You are an intelligence analyst writing a concise, fact-based intelligence brief. You have just received structured data that may contain information on one or more individuals. Your primary duty is to report with accuracy and to clearly state any uncertainty.
-
----STRUCTURED PROFILES---
-{cleaned_data}
----
-
-**Your Task & Critical Rules:**
-
-1.  **Analyze the Profiles:** First, examine the `profiles` list from the structured data.
-2.  **Handle Conflation (If `profiles` > 1):** If there is more than one profile, your report's primary finding **MUST** be that the data is likely conflated. State this clearly in the executive summary. Present the information for each identified profile separately.
-3.  **Handle Clear Cases (If `profiles` == 1):** If there is only one clear, high-confidence profile, generate a report based ONLY on the facts within that profile.
-4.  **Be Concise:** Use bullet points instead of long, speculative narratives, as instructed by the product manager.
-5.  **Acknowledge Gaps:** Explicitly list any missing key information.
-
-**Follow the structure below precisely.**
-
-**1. Executive Summary:**
-*   (If conflated): State that the investigation has uncovered multiple potential identities and a definitive assessment cannot be made. Briefly describe the distinct profiles found.
-*   (If clear): A 1-2 sentence summary of the subject's primary, confirmed role and affiliations.
-
-**2. Detailed Findings:**
-*   (If conflated): Create a separate section for each profile (e.g., "Profile A: AI Researcher," "Profile B: Artist") and list their respective facts as bullet points.
-*   (If clear): A bulleted list of the key, confirmed facts.
-
-**3. Risk Assessment:**
-*   **Risk Score:** (If conflated, this MUST be `MEDIUM` or `HIGH` due to the identity uncertainty). (If clear, assess as normal: Low, Medium, or High).
-*   **Justification:** Justify the score in 1-3 bullet points. For a conflated case, the justification is the identity ambiguity itself.
-
-**4. Information Gaps & Recommendations:**
-*   List what's missing. For a conflated case, the top recommendation is always "Immediate need for identity verification to de-conflict the data."
-"""
-
-JUDGE_PROMPT = """
-You are the "Judge," a meticulous quality control AI. Your role is to determine if a generated intelligence report is factually consistent with the provided source data and free of speculation.
-
-**Source Data (Cleaned Profiles):**
----
-{cleaned_data}
----
-
-**Generated Final Report:**
----
-{final_report}
----
-
-**Your Task:**
-Review the "Generated Final Report" and compare it against the "Source Data." Your answer **MUST BE ONLY the JSON object itself, with no other text before or after it.**
-
-**Output a single JSON object with two keys:**
-1. "is_accurate": A boolean value (true if the report is 100% factual and based ONLY on the source, false otherwise).
-2. "reasoning": A brief explanation for your decision.
-
-Example output format (do not copy content, only structure):
-{{
-    "is_accurate": true,
-    "reasoning": "All statements in the report are directly supported by the source data."
-}}
-"""
\ No newline at end of file
+# In api/app/prompts.py
+
+import json
+from typing import Final
+
+# --- Shared Preamble ---
+
+# Role framing and output discipline shared by every agent in the pipeline.
+# Sent once per call as the leading system block instead of being restated
+# inside each template.
+COMMON_SYSTEM_PREAMBLE = """
+You are part of an automated OSINT investigation pipeline. Ground every statement strictly in the data you are given and clearly separate fact from uncertainty; never speculate. Whenever your instructions ask for JSON, respond with a single valid JSON object and nothing else - no prose, no code fences, and no text before or after it.
+"""
+
+
+# --- Investigation Loop Prompts ---
+
+# Each prompt is split into a static part (role, rules, examples) sent as the
+# system block, and a dynamic part holding the per-call state. The static
+# parts are kept byte-identical across calls so OpenAI's automatic prefix
+# cache can hit them. On the Anthropic side they carry no cache_control
+# breakpoint: all of them are well under the 1024-token minimum cacheable
+# prefix, so a breakpoint would be silently ignored. The one explicit
+# breakpoint lives on the judge's cleaned-data block below.
+
+RESEARCHER_PROMPT_STATIC = """
+You are a world-class OSINT Query Analysis Agent. Your sole responsibility is to parse the user's raw query and extract the primary investigative entities.
+
+Based on the query, identify the main person, organization, location, or event to be investigated.
+Output a JSON object with a single key 'entities', which is a list of strings.
+Example:
+User Query: "Find out about Ali Khaledi Nasab"
+Output: {"entities": ["Ali Khaledi Nasab"]}
+"""
+
+# Dynamic parts are rendered by typed concatenation helpers over Final split
+# constants instead of template substitution: plain `+` on str avoids the
+# format/substitute dispatch machinery on every agent step, and the fully
+# annotated module compiles cleanly with mypyc should a build step ever want
+# the extra 2-3x on these paths.
+
+_RESEARCHER_DYN_HEAD: Final[str] = '\nUser Query: "'
+_RESEARCHER_DYN_TAIL: Final[str] = '"\n'
+
+
+def render_researcher_dynamic(query: str) -> str:
+    return _RESEARCHER_DYN_HEAD + query + _RESEARCHER_DYN_TAIL
+
+# The orchestrator prompt is split into a static part (role, tool catalog,
+# output schema) and a dynamic part (investigation state), so the up-to-15
+# orchestration calls per investigation share an identical system block and
+# only the state tail varies.
+
+ORCHESTRATOR_PROMPT_STATIC = """
+You are a master OSINT Orchestration Agent. Based on the current state of the investigation, your job is to select the best tools and queries to execute next to advance the investigation.
+
+**Available Tools:** {tool_names}
+
+**Your Task:**
+Review the 'Suggested Follow-up Questions' and the 'High-Level Analysis'. Select the 1 to 3 best tool/query pairs from 'Available Tools' to answer the most promising follow-up questions. The queries must be independent of each other (none should depend on another's result) because they will be executed in parallel. Formulate a precise, concise query for each tool call.
+"""
+
+_ORCHESTRATOR_DYN_HEAD: Final[str] = "\n**Current State of Investigation:**\n- **Initial Query:** "
+_ORCHESTRATOR_DYN_MID1: Final[str] = "\n- **High-Level Analysis:** "
+_ORCHESTRATOR_DYN_MID2: Final[str] = "\n- **Suggested Follow-up Questions:** "
+_ORCHESTRATOR_DYN_TAIL: Final[str] = "\n"
+
+
+def render_orchestrator_dynamic(query: str, analysis: str, follow_up_queries: str) -> str:
+    return (_ORCHESTRATOR_DYN_HEAD + query
+            + _ORCHESTRATOR_DYN_MID1 + analysis
+            + _ORCHESTRATOR_DYN_MID2 + follow_up_queries
+            + _ORCHESTRATOR_DYN_TAIL)
+
+ANALYST_PROMPT_STATIC = """
+You are an expert OSINT Pivot Agent. Your role is to analyze all data collected so far, synthesize it, identify gaps, and suggest the next concrete steps.
+
+**Your Tasks:**
+1.  **Synthesize:** Briefly update the `Existing Analysis` with any new, key information from the `Newly Collected Data`. The `Existing Analysis` is your running memory of earlier data; carry its key facts forward.
+2.  **Identify Gaps:** What crucial information is still missing to create a complete profile on the subject of the `Initial Query`?
+3.  **Suggest Follow-ups:** Generate a list of up to 3 specific, targeted follow-up search queries that would address these gaps. If the investigation seems complete or has hit a dead end, return an empty list.
+
+**Output a JSON object with two keys:**
+1. "analysis": A concise summary (2-3 sentences) of the current state of the investigation.
+2. "follow_up_queries": A list of strings for the next search queries. Return an empty list `[]` to end the investigation.
+"""
+
+_ANALYST_DYN_HEAD: Final[str] = "\n**Initial Query:** "
+_ANALYST_DYN_MID1: Final[str] = "\n**Existing Analysis (summary of everything collected so far):** "
+_ANALYST_DYN_MID2: Final[str] = "\n**Newly Collected Data (Context):**\n---\n"
+_ANALYST_DYN_TAIL: Final[str] = "\n---\n"
+
+
+def render_analyst_dynamic(query: str, analysis: str, context: str) -> str:
+    return (_ANALYST_DYN_HEAD + query
+            + _ANALYST_DYN_MID1 + analysis
+            + _ANALYST_DYN_MID2 + context
+            + _ANALYST_DYN_TAIL)
+
+
+# Used to fold the oldest already-analyzed snippets into one digest when the
+# accumulated context outgrows its token budget.
+COMPACTION_PROMPT = """
+Condense the following OSINT snippets into a single factual digest. Keep every concrete fact (names, roles, affiliations, dates, locations, identifiers) and which source type it came from; drop boilerplate and repetition. Respond with the digest text only.
+
+---SNIPPETS---
+"""
+
+
+# --- Reporting & Verification Prompts (The "Skeptical" Architecture) ---
+
+# Gemini-bound prompts keep all rules and examples ahead of the dynamic
+# content so the leading tokens form a stable, cache-friendly prefix.
+
+# Example blocks are authored as Python dicts and minified once at import:
+# pretty-printed JSON spends roughly a third of its tokens on indentation
+# runs that carry no signal for the model.
+
+_CLEANER_EXAMPLE = {
+    "profiles": [
+        {
+            "confidence_score": 0.95,
+            "profile_name": "AI Researcher Ali Khaledi",
+            "summary": "An AI researcher with a PhD from Stanford, previously at Amazon.",
+            "supporting_facts": [
+                "Affiliated with Stanford University as a Post-Doc in Neurosurgery.",
+                "Listed as a 'Research Scientist at QuantumLeap Inc.' on LinkedIn.",
+            ],
+        },
+        {
+            "confidence_score": 0.40,
+            "profile_name": "Artist Ali Khaledi",
+            "summary": "An established Iranian graphic designer and artist.",
+            "supporting_facts": [
+                "Served as general secretary of the 8th Tehran International Poster Biennial.",
+                "Affiliated with the Iranian Graphic Designers Society (IGDS).",
+            ],
+        },
+    ]
+}
+
+# CLEANER_PROMPT is a ChatPromptTemplate human template, so the example's
+# literal braces must be doubled to survive format parsing.
+_CLEANER_EXAMPLE_JSON = (
+    json.dumps(_CLEANER_EXAMPLE, separators=(",", ":")).replace("{", "{{").replace("}", "}}")
+)
+
+CLEANER_PROMPT = """
+You are an expert OSINT analyst specializing in entity resolution. Your task is to analyze a batch of raw text about a target, identify if the data points to one or multiple individuals, and then structure the verified information.
+
+**Your Task & Critical Rules:**
+1.  **Assume Conflation:** Start with the assumption that the data may contain information about SEVERAL different people with similar names. Your primary goal is to separate them.
+2.  **Identify Contradictions:** Look for contradictions in timelines, professions, and locations.
+3.  **Create Profiles:** For each distinct individual you identify, create a separate profile.
+4.  **Assign Confidence:** For each profile, assign a `confidence_score` from 0.0 to 1.0.
+5.  **Structure the Output:** Your output **MUST** be a single, valid JSON object with a single key, "profiles".
+
+**Example JSON Output (Do not copy the structure literally, use it as a guide):**
+""" + _CLEANER_EXAMPLE_JSON + """
+
+---TARGET---
+{query}
+---RAW CONTEXT---
+{context}
+---
+"""
+
+FINAL_REPORT_PROMPT = """
+You are an intelligence analyst writing a concise, fact-based intelligence brief. You have just received structured data that may contain information on one or more individuals. Your primary duty is to report with accuracy and to clearly state any uncertainty.
+
+**Your Task & Critical Rules:**
+
+1.  **Analyze the Profiles:** First, examine the `profiles` list from the structured data.
+2.  **Handle Conflation (If `profiles` > 1):** If there is more than one profile, your report's primary finding **MUST** be that the data is likely conflated. State this clearly in the executive summary. Present the information for each identified profile separately.
+3.  **Handle Clear Cases (If `profiles` == 1):** If there is only one clear, high-confidence profile, generate a report based ONLY on the facts within that profile.
+4.  **Be Concise:** Use bullet points instead of long, speculative narratives, as instructed by the product manager.
+5.  **Acknowledge Gaps:** Explicitly list any missing key information.
+
+**Follow the structure below precisely.**
+
+**1. Executive Summary:**
+*   (If conflated): State that the investigation has uncovered multiple potential identities and a definitive assessment cannot be made. Briefly describe the distinct profiles found.
+*   (If clear): A 1-2 sentence summary of the subject's primary, confirmed role and affiliations.
+
+**2. Detailed Findings:**
+*   (If conflated): Create a separate section for each profile (e.g., "Profile A: AI Researcher," "Profile B: Artist") and list their respective facts as bullet points.
+*   (If clear): A bulleted list of the key, confirmed facts.
+
+**3. Risk Assessment:**
+*   **Risk Score:** (If conflated, this MUST be `MEDIUM` or `HIGH` due to the identity uncertainty). (If clear, assess as normal: Low, Medium, or High).
+*   **Justification:** Justify the score in 1-3 bullet points. For a conflated case, the justification is the identity ambiguity itself.
+
+**4. Information Gaps & Recommendations:**
+*   List what's missing. For a conflated case, the top recommendation is always "Immediate need for identity verification to de-conflict the data."
+
+---STRUCTURED PROFILES---
+{cleaned_data}
+---
+"""
+
+# Split the same way as the orchestrator prompt: the rules are a cacheable
+# static system block, the per-investigation data goes in the user message.
+
+JUDGE_PROMPT_STATIC = """
+You are the "Judge," a meticulous quality control AI. Your role is to determine if a generated intelligence report is factually consistent with the provided source data and free of speculation.
+
+**Your Task:**
+Review the "Generated Final Report" and compare it against the "Source Data." Judge the report accurate only if it is 100% factual and every statement is directly supported by the source data, and give a brief reasoning for your decision either way.
+"""
+
+# The judge's dynamic content is further split in two: the cleaned-data block
+# is known before the report exists, so it can be sent ahead of time (with a
+# cache breakpoint) to warm the prompt cache while the writer is still
+# streaming the report.
+_JUDGE_CLEANED_DATA_HEAD: Final[str] = "\n**Source Data (Cleaned Profiles):**\n---\n"
+_JUDGE_CLEANED_DATA_TAIL: Final[str] = "\n---\n"
+
+
+def render_judge_cleaned_data(cleaned_data: str) -> str:
+    return _JUDGE_CLEANED_DATA_HEAD + cleaned_data + _JUDGE_CLEANED_DATA_TAIL
+
+_JUDGE_REPORT_HEAD: Final[str] = "\n**Generated Final Report:**\n---\n"
+_JUDGE_REPORT_TAIL: Final[str] = "\n---\n"
+
+
+def render_judge_report(final_report: str) -> str:
+    return _JUDGE_REPORT_HEAD + final_report + _JUDGE_REPORT_TAIL
\ No newline at end of file
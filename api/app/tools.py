@@ -1,69 +1,200 @@
 # In api/app/tools.py
 
+import functools
+import logging
 import os
-from tavily import TavilyClient
+import re
+from collections import OrderedDict
+from contextvars import ContextVar
+import httpx
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # --- REAL TOOL INITIALIZATION ---
+# Tavily's own client builds a fresh httpx client for every call, so each
+# search pays TCP+TLS setup (~100-300ms) on top of the query. All searches go
+# through this one pooled async client instead: keep-alive reuses connections
+# across the agent loop, and HTTP/2 (when the h2 extra is installed) lets the
+# orchestrator's gathered searches multiplex a single TLS tunnel.
+_TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
+_SESSION_KWARGS = dict(
+    timeout=30.0,
+    limits=httpx.Limits(max_connections=16, max_keepalive_connections=8),
+)
 try:
-    tavily = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
-    print("INFO: Tavily client initialized successfully")
-except KeyError:
-    print("WARNING: TAVILY_API_KEY not found. Web search will use a mock fallback.")
-    tavily = None
+    _SESSION = httpx.AsyncClient(http2=True, **_SESSION_KWARGS)
+except ImportError:
+    _SESSION = httpx.AsyncClient(**_SESSION_KWARGS)
+logger.info("Tavily %s", "configured" if _TAVILY_API_KEY else "disabled (web search will use a mock fallback)")
+
+_TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+
+async def close_http_session():
+    """Closes the pooled HTTP client; wired to FastAPI shutdown."""
+    await _SESSION.aclose()
+
+# Every tool returns a columnar (sources, contents) pair of parallel lists
+# rather than a list of per-item dicts; downstream context assembly is then a
+# straight join over contents with no per-item key lookups.
+ToolResult = Tuple[List[str], List[str]]
+
+# --- TOOL MEMOIZATION ---
+# The analyst often regenerates near-identical follow-up queries across
+# iterations, and the orchestrator may re-pick the same tool/query pair. Every
+# tool is memoized on (tool_name, normalized query): a hit skips the external
+# call (a ~1-3s Tavily round trip for web_search) and saves API quota.
+#
+# The cache is scoped per investigation, not per process: up to a dozen
+# investigations run concurrently in one worker, and a shared cache would let
+# results leak between them (and a clear at one investigation's start would
+# wipe the others' warm entries mid-run). Each investigation binds its own
+# cache to the running task via a ContextVar before invoking the graph; tool
+# calls anywhere in that task tree inherit it, and it is dropped with the
+# task when the investigation ends.
+_TOOL_CACHE_MAX = 256
+
+_tool_cache_var: "ContextVar[Optional[Dict[str, object]]]" = ContextVar("tool_cache", default=None)
+
+
+def open_tool_cache() -> None:
+    """Binds a fresh memoization cache to the current investigation's context."""
+    _tool_cache_var.set({
+        "entries": OrderedDict(),
+        "stats": {"hits": 0, "misses": 0},
+    })
+
+def _normalize_query(query: str) -> str:
+    """Normalizes a query for cache lookup (case/whitespace-insensitive)."""
+    return " ".join(query.lower().split())
 
-def web_search(query: str) -> List[Dict[str, str]]:
+_WS = re.compile(r"\s+")
+
+def memoize_tool(name: str):
+    """Decorator memoizing a tool on its normalized (first) query argument."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def inner(query: str, *args) -> ToolResult:
+            cache = _tool_cache_var.get()
+            if cache is None:
+                # No investigation context bound (ad-hoc/direct call): skip
+                # memoization rather than share state across callers.
+                return await fn(query, *args)
+            entries = cache["entries"]
+            key = (name, _normalize_query(query))
+            cached = entries.get(key)
+            if cached is not None:
+                entries.move_to_end(key)
+                cache["stats"]["hits"] += 1
+                logger.debug("Cache hit for %s: %s", name, query)
+                return (list(cached[0]), list(cached[1]))
+            cache["stats"]["misses"] += 1
+            sources, contents = await fn(query, *args)
+            if contents:  # don't pin failures/empty results in the cache
+                entries[key] = (sources, contents)
+                if len(entries) > _TOOL_CACHE_MAX:
+                    entries.popitem(last=False)
+            return (list(sources), list(contents))
+        return inner
+    return wrap
+
+def tool_cache_stats() -> Dict[str, int]:
+    """Returns a snapshot of the current investigation's hit/miss counters."""
+    cache = _tool_cache_var.get()
+    if cache is None:
+        return {"hits": 0, "misses": 0}
+    return dict(cache["stats"])
+
+@memoize_tool("web_search")
+async def web_search(query: str) -> ToolResult:
     """Performs a real web search using Tavily and returns the results."""
-    print(f"INFO: Performing web search for: {query}")
+    logger.debug("Performing web search for: %s", query)
     try:
-        if tavily is not None:
-            # Use the real Tavily client if available
-            results = tavily.search(query=query, search_depth="advanced", max_results=5)
+        if _TAVILY_API_KEY:
+            # Direct POST through the pooled session instead of the Tavily SDK
+            # (which would open and close a connection per call).
+            response = await _SESSION.post(_TAVILY_SEARCH_URL, json={
+                "api_key": _TAVILY_API_KEY,
+                "query": query,
+                "search_depth": "advanced",
+                "max_results": 5,
+            })
+            response.raise_for_status()
+            results = response.json()
             if "results" not in results:
-                return []
-            return [{"source": "web_search", "content": r["content"]} for r in results["results"]]
+                return ([], [])
+            contents = [r["content"] for r in results["results"]]
+            sources = ["web_search"] * len(contents)
         else:
             # Provide a mock response ONLY if Tavily is not configured
-            print("INFO: Using MOCK web_search.")
-            return [
-                {"source": "web_search_mock", "content": f"A news article from Example.com mentions {query} in the context of a recent tech conference."},
-                {"source": "web_search_mock", "content": f"A blog post discusses a project attributed to {query}."}
+            logger.debug("Using MOCK web_search.")
+            sources = ["web_search_mock", "web_search_mock"]
+            contents = [
+                f"A news article from Example.com mentions {query} in the context of a recent tech conference.",
+                f"A blog post discusses a project attributed to {query}."
             ]
     except Exception as e:
-        print(f"ERROR: Web search failed: {e}")
-        return []
+        logger.error("Web search failed: %s", e)
+        return ([], [])
+
+    return (sources, contents)
 
 # --- NEUTRAL, DYNAMIC MOCKED TOOLS ---
 # These functions now generate plausible, generic data that incorporates the entity_name.
 # This prevents the hardcoded data contamination.
+#
+# The canned findings live in module-level (source, template) tuples built
+# once at import; each call only fills in the entity. Repeated entities skip
+# even that, since memoize_tool already caches per normalized query (the
+# wrapper hands out list copies, so callers may mutate results freely).
+
+_SOCIAL_MEDIA_FINDINGS = (
+    ("social_media_mock", "A public LinkedIn profile for an individual named {e} was found. The profile lists a position as 'Software Engineer' at 'TechCorp'."),
+    ("social_media_mock", "A Twitter/X account with the handle @{h}_dev was found. It frequently posts about software development."),
+)
+
+_COMPANY_DB_FINDINGS = (
+    ("company_db_mock", "No public records found listing {e} as a director or officer in major company registries."),
+)
+
+_ACADEMIC_FINDINGS = (
+    ("academic_mock", "Found a publication on arXiv authored by someone named {e}, titled 'A Study on Abstract Systems'."),
+    ("academic_mock", "The University of Example's website lists a student named {e} in their computer science program alumni directory."),
+)
+
+def _render_findings(templates, **fields) -> ToolResult:
+    """Fills a findings template tuple into the standard tool result shape."""
+    return ([source for source, _ in templates],
+            [content.format(**fields) for _, content in templates])
+
+@memoize_tool("social_media_search")
+async def social_media_search(entity_name: str, handle: Optional[str] = None) -> ToolResult:
+    """MOCK: Searches social media for an entity.
 
-def social_media_search(entity_name: str) -> List[Dict[str, str]]:
-    """MOCK: Searches social media for an entity."""
-    print(f"MOCK: Searching social media for {entity_name}")
-    # Return plausible but generic findings.
-    return [
-        {"source": "social_media_mock", "content": f"A public LinkedIn profile for an individual named {entity_name} was found. The profile lists a position as 'Software Engineer' at 'TechCorp'."},
-        {"source": "social_media_mock", "content": f"A Twitter/X account with the handle @{entity_name.replace(' ', '')}_dev was found. It frequently posts about software development."}
-    ]
+    Callers holding an entity record pass its precomputed handle; free-form
+    orchestrator queries fall back to deriving one here.
+    """
+    logger.debug("MOCK: Searching social media for %s", entity_name)
+    if handle is None:
+        handle = _WS.sub("", entity_name)
+    return _render_findings(_SOCIAL_MEDIA_FINDINGS, e=entity_name, h=handle)
 
-def company_database_search(entity_name: str) -> List[Dict[str, str]]:
+@memoize_tool("company_database_search")
+async def company_database_search(entity_name: str) -> ToolResult:
     """MOCK: Searches company registration database."""
-    print(f"MOCK: Searching company database for {entity_name}")
-    return [
-        {"source": "company_db_mock", "content": f"No public records found listing {entity_name} as a director or officer in major company registries."}
-    ]
+    logger.debug("MOCK: Searching company database for %s", entity_name)
+    return _render_findings(_COMPANY_DB_FINDINGS, e=entity_name)
 
-def academic_search(entity_name: str) -> List[Dict[str, str]]:
+@memoize_tool("academic_search")
+async def academic_search(entity_name: str) -> ToolResult:
     """MOCK: Searches academic publications and records."""
-    print(f"MOCK: Searching academic papers for {entity_name}")
-    return [
-        {"source": "academic_mock", "content": f"Found a publication on arXiv authored by someone named {entity_name}, titled 'A Study on Abstract Systems'."},
-        {"source": "academic_mock", "content": f"The University of Example's website lists a student named {entity_name} in their computer science program alumni directory."}
-    ]
+    logger.debug("MOCK: Searching academic papers for %s", entity_name)
+    return _render_findings(_ACADEMIC_FINDINGS, e=entity_name)
 
 # --- TOOL REGISTRY ---
 # List of all available tools for the orchestrator
@@ -1,16 +1,50 @@
-from typing import TypedDict, List, Optional, Dict, Any
-
-class InvestigationState(TypedDict, total=False):
-    """
-    Represents the state of our investigation at any given time.
-    """
-    query: str
-    entities: List[str]
-    plan: Optional[str]
-    retrieved_data: List[Dict[str, str]]  # List of {source: str, content: str}
-    log: List[str]
-    analysis: str
-    follow_up_queries: List[str]
-    retrieval_count: int  # Tracks number of retrieval cycles
-    cleaned_data: Dict[str, Any]    # Cleaned and structured data before final report
-    final_report: str 
\ No newline at end of file
+from typing import TypedDict, List, Optional, Dict, Any, Literal
+
+from pydantic import BaseModel
+
+class InvestigationState(TypedDict, total=False):
+    """
+    Represents the state of our investigation at any given time.
+    """
+    query: str
+    entities: List[Dict[str, str]]  # {"name": ..., "handle": ...} with the handle precomputed
+    entity_extraction_failed: bool  # True when the researcher errored and entities is just the raw query
+    plan: Optional[str]
+    retrieved_sources: List[str]  # Parallel to retrieved_contents: which tool produced each item
+    retrieved_contents: List[str]  # Retrieved snippet text, one entry per item
+    content_hashes: List[int]  # Hashes of retrieved content, for deduplication
+    last_seen_idx: int  # How many retrieved items the analyst has already seen
+    context_compacted: bool  # True once old snippets have been folded into a summary digest
+    log: List[str]
+    analysis: str
+    last_response_id: Optional[str]  # OpenAI Responses API id for the analyst's server-side thread
+    follow_up_queries: List[str]
+    retrieval_count: int  # Tracks number of retrieval cycles
+    tool_cache_stats: Dict[str, int]  # Hit/miss counters from the tool memoization cache
+    cleaned_data: Dict[str, Any]    # Cleaned and structured data before final report
+    final_report: str 
+
+# Tool names the orchestrator may select; must match tools.AVAILABLE_TOOLS.
+ToolName = Literal[
+    "web_search",
+    "social_media_search",
+    "company_database_search",
+    "academic_search",
+]
+
+
+class OrchestratorCall(BaseModel):
+    """One tool invocation chosen by the orchestrator."""
+    tool_name: ToolName
+    query: str
+
+
+class OrchestratorPlan(BaseModel):
+    """Schema-enforced orchestrator output: 1-3 independent tool calls."""
+    tool_calls: List[OrchestratorCall]
+
+
+class JudgeVerdict(BaseModel):
+    """Schema-enforced judge output."""
+    is_accurate: bool
+    reasoning: str